@@ -0,0 +1,25 @@
+from fastapi import Request
+
+from ..services import NLPParser, GroceryListGenerator, RecipeSearcher, RobotsCache, HostThrottle
+
+
+# Shared service instances are created once in the app lifespan (see app/main.py)
+
+def get_nlp_parser(request: Request) -> NLPParser:
+    return request.app.state.nlp_parser
+
+
+def get_grocery_generator(request: Request) -> GroceryListGenerator:
+    return request.app.state.grocery_generator
+
+
+def get_recipe_searcher(request: Request) -> RecipeSearcher:
+    return request.app.state.recipe_searcher
+
+
+def get_robots_cache(request: Request) -> RobotsCache:
+    return request.app.state.robots_cache
+
+
+def get_host_throttle(request: Request) -> HostThrottle:
+    return request.app.state.host_throttle
@@ -1,19 +1,233 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import logging
+from functools import partial
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from slowapi import Limiter
+from slowapi.util import get_remote_address
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
 
-from ..models.base import get_db
-from ..schemas.query import QueryRequest, QueryResponse
+from .dependencies import get_nlp_parser, get_grocery_generator, get_recipe_searcher, get_robots_cache, get_host_throttle
+from ..models.base import get_db, SessionLocal
+from ..schemas.query import QueryRequest, QueryResponse, ParsedQuery
 from ..schemas.recipe import RecipeSchema
 from ..schemas.ingredient import IngredientSchema
 from ..schemas.url_fetch import URLFetchRequest, URLFetchResponse, SupportedSitesResponse
-from ..services import NLPParser, RecipeMatcher, GroceryListGenerator, RecipeFetcher, RecipeFetcherError, RecipeSearcher
+from ..services.recipe_matcher import invalidate_recipe_cache
+from ..services import NLPParser, RecipeMatcher, GroceryListGenerator, RecipeFetcher, RecipeFetcherError, RecipeSearcher, RobotsCache, RecipeCache, HostThrottle
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Inbound rate limiting, keyed by client address (registered on the app in app/main.py)
+limiter = Limiter(key_func=get_remote_address)
+
+# Maximum number of recipe URLs fetched concurrently for a single query
+FETCH_CONCURRENCY = 10
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share an in-flight entry"""
+    return " ".join(query.lower().split())
+
+
+# In-flight query computations keyed by normalized query text, so concurrent
+# identical queries share one NLP + web search pipeline
+_inflight: Dict[str, "asyncio.Task[QueryResponse]"] = {}
+
+
+def _discard_inflight(key: str, task: asyncio.Task) -> None:
+    """Remove a finished computation from the in-flight map"""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+
+
+def _load_cached_recipe(url: str) -> Optional[RecipeSchema]:
+    """
+    Return a recipe fetched from the URL within the last 30 days, if any.
+
+    Cached recipes were already saved on their first fetch, so a hit needs no
+    robots.txt check or request to the site. Runs in a worker thread with its
+    own database session.
+    """
+    db = SessionLocal()
+    try:
+        return RecipeCache(db).get(url)
+    finally:
+        db.close()
+
+
+def _cache_fetched_recipe(recipe_cache: RecipeCache, url: str, recipe: RecipeSchema) -> None:
+    """
+    Cache a recipe that was already fetched and saved.
+
+    A cache write failure is only logged, so it can't fail a fetch that
+    already succeeded.
+    """
+    try:
+        recipe_cache.set(url, recipe)
+    except Exception as e:
+        recipe_cache.db.rollback()
+        logger.warning("Could not cache recipe from %s: %s", url, e)
+
+
+def _fetch_recipe(url: str) -> RecipeSchema:
+    """
+    Fetch a recipe from a URL, save it to the database, and cache it.
+
+    Runs in a worker thread, so it opens its own database session rather than
+    sharing the request session across threads.
+    """
+    db = SessionLocal()
+    try:
+        # Fetch recipe and save to DB for future use
+        fetcher = RecipeFetcher(db=db)
+        recipe = fetcher.fetch_recipe_from_url(url, save_to_db=True)
+        invalidate_recipe_cache(recipe.id)
+        _cache_fetched_recipe(RecipeCache(db), url, recipe)
+        logger.info("Fetched and saved: %s", recipe.name)
+        return recipe
+    finally:
+        db.close()
+
+
+def _find_local_recipes(parsed_query: ParsedQuery) -> List[RecipeSchema]:
+    """
+    Find recipes in the local database that match a parsed query.
+
+    Runs in a worker thread, so it opens its own database session; the
+    session never crosses threads or outlives the call.
+    """
+    db = SessionLocal()
+    try:
+        return RecipeMatcher(db).find_matching_recipes(parsed_query)
+    finally:
+        db.close()
+
+
+async def _compute_query_response(
+    query: str,
+    nlp_parser: NLPParser,
+    grocery_generator: GroceryListGenerator,
+    searcher: RecipeSearcher,
+    robots_cache: RobotsCache,
+    host_throttle: HostThrottle
+) -> QueryResponse:
+    """
+    Run the full query pipeline: parse, match, search the web, and build the grocery list.
+
+    The computation is shared by every caller with the same query and can
+    outlive the request that started it, so database work uses sessions
+    opened in the worker threads instead of a request-scoped one.
+    """
+    # Step 1: Parse the natural language query
+    parsed_query = await nlp_parser.aparse_query(query)
+
+    # Step 2: Find matching recipes in local database (blocking DB I/O, so off the event loop)
+    suggested_recipes = await asyncio.to_thread(_find_local_recipes, parsed_query)
+
+    recipes_from_web = 0
+    search_performed = False
+
+    # Step 3: If we don't have enough recipes, search the web
+    desired_count = parsed_query.meal_count or 5
+    if len(suggested_recipes) < desired_count:
+        logger.info("Found %d recipes in database. Searching web for more...", len(suggested_recipes))
+        search_performed = True
+
+        # Search the web for recipe URLs
+        recipe_urls = await asyncio.to_thread(
+            searcher.search_recipes,
+            parsed_query,
+            max_results=desired_count - len(suggested_recipes)
+        )
+
+        logger.info("Found %d potential recipe URLs", len(recipe_urls))
+
+        # Step 4: Fetch recipes from URLs concurrently
+        fetcher = RecipeFetcher()
+        supported_urls = []
+        for url in recipe_urls:
+            if fetcher.is_url_supported(url):
+                supported_urls.append(url)
+            else:
+                logger.info("Skipping %s: unsupported site", url)
+
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+        async def bounded_fetch(url: str) -> Optional[RecipeSchema]:
+            recipe = await asyncio.to_thread(_load_cached_recipe, url)
+            if recipe is not None:
+                logger.info("Loaded from cache: %s", recipe.name)
+                return recipe
+
+            if not await robots_cache.can_fetch(url):
+                logger.info("Skipping %s: robots.txt disallows", url)
+                return None
+
+            # Wait out the per-host limit before taking a global slot, so tasks
+            # queued on a busy host don't block fetches to other hosts
+            async with host_throttle.slot(url), semaphore:
+                logger.info("Attempting to fetch: %s", url)
+                return await asyncio.to_thread(_fetch_recipe, url)
+
+        # Take recipes as fetches complete and stop once we have enough,
+        # rather than waiting on the slowest URL
+        pending = {asyncio.create_task(bounded_fetch(url)): url for url in supported_urls}
+        try:
+            while pending and len(suggested_recipes) < desired_count:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    try:
+                        recipe = task.result()
+                    except RecipeFetcherError as e:
+                        logger.warning("Failed to fetch %s: %s", url, e)
+                    except Exception as e:
+                        logger.warning("Unexpected error fetching %s: %s", url, e)
+                    else:
+                        if recipe is not None and len(suggested_recipes) < desired_count:
+                            suggested_recipes.append(recipe)
+                            recipes_from_web += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        logger.info("Total recipes after web search: %d (%d from web)", len(suggested_recipes), recipes_from_web)
+
+    # Step 5: Generate grocery list
+    grocery_list = grocery_generator.generate_grocery_list(
+        recipes=suggested_recipes,
+        owned_ingredients=parsed_query.owned_ingredients,
+        skip_owned=True
+    )
+
+    # Calculate estimated cost (placeholder for now)
+    total_cost = grocery_generator.calculate_estimated_cost(grocery_list)
+
+    return QueryResponse(
+        parsed_query=parsed_query,
+        suggested_recipes=suggested_recipes,
+        grocery_list=grocery_list,
+        total_estimated_cost=total_cost if total_cost > 0 else None,
+        recipes_from_web=recipes_from_web,
+        search_performed=search_performed
+    )
+
 
 @router.post("/query", response_model=QueryResponse)
-async def process_query(request: QueryRequest, db: Session = Depends(get_db)):
+@limiter.limit("10/minute")
+async def process_query(
+    request: Request,
+    query_request: QueryRequest,
+    nlp_parser: NLPParser = Depends(get_nlp_parser),
+    grocery_generator: GroceryListGenerator = Depends(get_grocery_generator),
+    searcher: RecipeSearcher = Depends(get_recipe_searcher),
+    robots_cache: RobotsCache = Depends(get_robots_cache),
+    host_throttle: HostThrottle = Depends(get_host_throttle)
+):
     """
     Process a natural language query and return suggested recipes and grocery list.
 
@@ -30,101 +244,51 @@ async def process_query(request: QueryRequest, db: Session = Depends(get_db)):
     - "Find me 5 vegan Mexican recipes with black beans"
     - "High protein chicken dinners for this week"
     """
-    try:
-        # Step 1: Parse the natural language query
-        nlp_parser = NLPParser()
-        parsed_query = nlp_parser.parse_query(request.query)
-
-        # Step 2: Find matching recipes in local database
-        recipe_matcher = RecipeMatcher(db)
-        suggested_recipes = recipe_matcher.find_matching_recipes(parsed_query)
-
-        recipes_from_web = 0
-        search_performed = False
-
-        # Step 3: If we don't have enough recipes, search the web
-        desired_count = parsed_query.meal_count or 5
-        if len(suggested_recipes) < desired_count:
-            print(f"Found {len(suggested_recipes)} recipes in database. Searching web for more...")
-            search_performed = True
-
-            # Search the web for recipe URLs
-            searcher = RecipeSearcher()
-            recipe_urls = searcher.search_recipes(
-                parsed_query,
-                max_results=desired_count - len(suggested_recipes)
-            )
-
-            print(f"Found {len(recipe_urls)} potential recipe URLs")
-
-            # Step 4: Fetch recipes from URLs
-            fetcher = RecipeFetcher(db=db)
-
-            for url in recipe_urls:
-                try:
-                    print(f"Attempting to fetch: {url}")
-
-                    # Check if URL is supported and allowed
-                    if not fetcher.is_url_supported(url):
-                        print(f"  Skipping: unsupported site")
-                        continue
-
-                    if not fetcher.check_robots_txt(url):
-                        print(f"  Skipping: robots.txt disallows")
-                        continue
-
-                    # Fetch recipe and save to DB for future use
-                    recipe = fetcher.fetch_recipe_from_url(url, save_to_db=True)
-                    suggested_recipes.append(recipe)
-                    recipes_from_web += 1
-
-                    print(f"  ✓ Fetched and saved: {recipe.name}")
-
-                    # Stop if we have enough
-                    if len(suggested_recipes) >= desired_count:
-                        break
-
-                except RecipeFetcherError as e:
-                    print(f"  Failed to fetch {url}: {e}")
-                    continue
-                except Exception as e:
-                    print(f"  Unexpected error fetching {url}: {e}")
-                    continue
+    key = _normalize_query(query_request.query)
 
-            print(f"Total recipes after web search: {len(suggested_recipes)} ({recipes_from_web} from web)")
-
-        # Step 5: Generate grocery list
-        grocery_generator = GroceryListGenerator()
-        grocery_list = grocery_generator.generate_grocery_list(
-            recipes=suggested_recipes,
-            owned_ingredients=parsed_query.owned_ingredients
-        )
-
-        # Calculate estimated cost (placeholder for now)
-        total_cost = grocery_generator.calculate_estimated_cost(grocery_list)
+    try:
+        task = _inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(_compute_query_response(
+                query_request.query, nlp_parser, grocery_generator, searcher, robots_cache, host_throttle
+            ))
+            _inflight[key] = task
+            task.add_done_callback(partial(_discard_inflight, key))
 
-        return QueryResponse(
-            parsed_query=parsed_query,
-            suggested_recipes=[recipe.model_dump() for recipe in suggested_recipes],
-            grocery_list=[item.model_dump() for item in grocery_list],
-            total_estimated_cost=total_cost if total_cost > 0 else None,
-            recipes_from_web=recipes_from_web,
-            search_performed=search_performed
-        )
+        # Shield so a disconnecting client doesn't cancel the shared computation
+        return await asyncio.shield(task)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
 @router.get("/recipes", response_model=List[RecipeSchema])
-async def get_all_recipes(db: Session = Depends(get_db)):
+def get_all_recipes(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of recipes to return"),
+    db: Session = Depends(get_db)
+):
     """Get all available recipes"""
     recipe_matcher = RecipeMatcher(db)
-    return recipe_matcher.get_all_recipes()
+    return recipe_matcher.get_all_recipes(limit=limit)
+
+
+@router.get("/recipes/supported-sites", response_model=SupportedSitesResponse)
+async def get_supported_sites(request: Request, response: Response):
+    """
+    Get a list of supported recipe websites.
+
+    The list is fixed for the lifetime of the process, so it is built once at
+    startup and clients and proxies may cache it for a day.
+
+    Returns:
+        List of website domains that can be scraped for recipes
+    """
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return request.app.state.supported_sites
 
 
 @router.get("/recipes/{recipe_id}", response_model=RecipeSchema)
-async def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
+def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
     """Get a specific recipe by ID"""
     recipe_matcher = RecipeMatcher(db)
     recipe = recipe_matcher.get_recipe_by_id(recipe_id)
@@ -140,7 +304,7 @@ async def health_check():
 
 
 @router.post("/recipes/fetch-from-url", response_model=URLFetchResponse)
-async def fetch_recipe_from_url(request: URLFetchRequest, db: Session = Depends(get_db)):
+def fetch_recipe_from_url(request: URLFetchRequest, db: Session = Depends(get_db)):
     """
     Fetch a recipe from a URL and optionally save it to the database.
 
@@ -159,6 +323,17 @@ async def fetch_recipe_from_url(request: URLFetchRequest, db: Session = Depends(
         URLFetchResponse with fetched recipe data
     """
     try:
+        # Only saved recipes are cached, so a hit is already in the database
+        recipe_cache = RecipeCache(db)
+        recipe = recipe_cache.get(request.url)
+        if recipe is not None:
+            return URLFetchResponse(
+                success=True,
+                message="Recipe loaded from cache",
+                recipe=recipe.model_dump(),
+                source_url=request.url
+            )
+
         fetcher = RecipeFetcher(db=db)
 
         # Fetch recipe
@@ -169,6 +344,8 @@ async def fetch_recipe_from_url(request: URLFetchRequest, db: Session = Depends(
 
         message = "Recipe fetched successfully"
         if request.save_to_db:
+            invalidate_recipe_cache(recipe.id)
+            _cache_fetched_recipe(recipe_cache, request.url, recipe)
             message += " and saved to database"
 
         return URLFetchResponse(
@@ -182,24 +359,3 @@ async def fetch_recipe_from_url(request: URLFetchRequest, db: Session = Depends(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching recipe: {str(e)}")
-
-
-@router.get("/recipes/supported-sites", response_model=SupportedSitesResponse)
-async def get_supported_sites():
-    """
-    Get a list of supported recipe websites.
-
-    Returns:
-        List of website domains that can be scraped for recipes
-    """
-    try:
-        fetcher = RecipeFetcher()
-        sites = fetcher.get_supported_sites_list()
-
-        return SupportedSitesResponse(
-            supported_sites=sites,
-            total_count=len(sites),
-            message=f"This API supports fetching recipes from {len(sites)} websites"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting supported sites: {str(e)}")
@@ -1,19 +1,95 @@
+import asyncio
+import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Tuple
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api.routes import router
+from fastapi.responses import ORJSONResponse
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from recipe_scrapers._abstract import HEADERS as SCRAPER_HEADERS
+from .api.routes import router, limiter
 from .models.base import init_db
+from .schemas.url_fetch import SupportedSitesResponse
+from .services import NLPParser, GroceryListGenerator, RecipeSearcher, RobotsCache, HostThrottle, RecipeFetcher
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def configure_logging() -> Tuple[QueueListener, QueueHandler]:
+    """
+    Route log records through a queue so request handlers never block on stream I/O.
+
+    Records are written to stderr by a background listener thread. The queue
+    handler is returned so shutdown can detach it from the root logger.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    queue_handler = QueueHandler(log_queue)
+    root_logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener, queue_handler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database and shared services on startup, release them on shutdown"""
+    log_listener, log_handler = configure_logging()
+
+    init_db()
+    logger.info("Database initialized successfully")
+
+    # Stateless services are shared across requests instead of built per call
+    app.state.nlp_parser = NLPParser()
+    await asyncio.to_thread(app.state.nlp_parser.preload)
+    app.state.grocery_generator = GroceryListGenerator()
+    app.state.recipe_searcher = RecipeSearcher()
+    # RecipeFetcher scrapes through recipe-scrapers, so check robots.txt as that agent
+    app.state.robots_cache = RobotsCache(user_agent=SCRAPER_HEADERS["User-Agent"])
+    app.state.host_throttle = HostThrottle()
+
+    # The supported site list is fixed for the process lifetime, so build the response once
+    sites = RecipeFetcher().get_supported_sites_list()
+    app.state.supported_sites = SupportedSitesResponse(
+        supported_sites=sites,
+        total_count=len(sites),
+        message=f"This API supports fetching recipes from {len(sites)} websites"
+    )
+
+    yield
+
+    await app.state.nlp_parser.aclose()
+    app.state.robots_cache.close()
+    # Detach before stopping so a later startup doesn't stack a second handler
+    logging.getLogger().removeHandler(log_handler)
+    log_listener.stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Nutrition Query API",
     description="Backend API for processing natural language meal planning queries into optimized grocery lists",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Rate limit inbound queries (limits are declared on the routes)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
 # Configure CORS (adjust origins as needed for production)
 app.add_middleware(
     CORSMiddleware,
@@ -27,13 +103,6 @@ app.add_middleware(
 app.include_router(router, prefix="/api/v1", tags=["queries"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-    print("Database initialized successfully")
-
-
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,5 +1,6 @@
 from .ingredient import Ingredient
 from .recipe import Recipe, RecipeIngredient
 from .dietary_restriction import DietaryRestriction
+from .recipe_cache import RecipeCacheEntry
 
-__all__ = ["Ingredient", "Recipe", "RecipeIngredient", "DietaryRestriction"]
+__all__ = ["Ingredient", "Recipe", "RecipeIngredient", "DietaryRestriction", "RecipeCacheEntry"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 from .dietary_restriction import recipe_dietary_restrictions
@@ -6,6 +6,10 @@ from .dietary_restriction import recipe_dietary_restrictions
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    __table_args__ = (
+        # Covers RecipeMatcher's meal type filter alone and combined with cuisine
+        Index("ix_recipes_meal_cuisine", "meal_type", "cuisine"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Text
+from .base import Base
+
+
+class RecipeCacheEntry(Base):
+    """Previously fetched web recipe, keyed by the SHA-1 hash of its source URL"""
+    __tablename__ = "recipe_cache"
+
+    url_hash = Column(String(40), primary_key=True)
+    recipe_json = Column(Text, nullable=False)  # Serialized RecipeSchema
+    fetched_at = Column(Integer, nullable=False)  # Unix timestamp
+
+    def __repr__(self):
+        return f"<RecipeCacheEntry(url_hash='{self.url_hash}', fetched_at={self.fetched_at})>"
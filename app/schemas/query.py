@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from .recipe import RecipeSchema
+from .ingredient import GroceryListItem
 
 
 class QueryRequest(BaseModel):
@@ -29,8 +31,8 @@ class ParsedQuery(BaseModel):
 class QueryResponse(BaseModel):
     """Response containing parsed query, suggested recipes, and grocery list"""
     parsed_query: ParsedQuery
-    suggested_recipes: List[dict]  # Will contain RecipeSchema objects
-    grocery_list: List[dict]  # Will contain GroceryListItem objects
+    suggested_recipes: List[RecipeSchema]
+    grocery_list: List[GroceryListItem]
     total_estimated_cost: Optional[float] = None  # For future optimization features
     recipes_from_web: int = Field(default=0, description="Number of recipes fetched from the web")
     search_performed: bool = Field(default=False, description="Whether a web search was performed")
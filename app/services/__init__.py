@@ -3,6 +3,9 @@ from .recipe_matcher import RecipeMatcher
 from .grocery_list_generator import GroceryListGenerator
 from .recipe_fetcher import RecipeFetcher, RecipeFetcherError
 from .recipe_search import RecipeSearcher
+from .robots_cache import RobotsCache
+from .recipe_cache import RecipeCache
+from .host_throttle import HostThrottle
 
 __all__ = [
     "NLPParser",
@@ -10,5 +13,8 @@ __all__ = [
     "GroceryListGenerator",
     "RecipeFetcher",
     "RecipeFetcherError",
-    "RecipeSearcher"
+    "RecipeSearcher",
+    "RobotsCache",
+    "RecipeCache",
+    "HostThrottle"
 ]
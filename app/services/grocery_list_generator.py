@@ -1,16 +1,22 @@
-from typing import List, Dict
-from collections import defaultdict
+from typing import List, Dict, Tuple
 from ..schemas.recipe import RecipeSchema
 from ..schemas.ingredient import GroceryListItem
 
 
+def _row_sort_key(row: Tuple[Tuple[str, str], list]) -> Tuple[str, str]:
+    """Sort aggregated rows by category (uncategorized last) and then by name"""
+    (ingredient_name, _), (_, _, category) = row
+    return (category or "zzz", ingredient_name)
+
+
 class GroceryListGenerator:
     """Generates and optimizes grocery lists from recipes"""
 
     def generate_grocery_list(
         self,
         recipes: List[RecipeSchema],
-        owned_ingredients: List[str] = None
+        owned_ingredients: List[str] = None,
+        skip_owned: bool = False
     ) -> List[GroceryListItem]:
         """
         Generate a consolidated grocery list from multiple recipes.
@@ -18,6 +24,8 @@ class GroceryListGenerator:
         Args:
             recipes: List of recipes to create grocery list from
             owned_ingredients: List of ingredient names the user already has
+            skip_owned: Leave owned ingredients out of the list entirely instead
+                of marking them as already_owned
 
         Returns:
             List of grocery items with aggregated quantities
@@ -28,42 +36,42 @@ class GroceryListGenerator:
         # Normalize owned ingredients to lowercase for comparison
         owned_set = {ing.lower().strip() for ing in owned_ingredients}
 
-        # Aggregate ingredients across all recipes
-        # Key: (ingredient_name, unit), Value: {total_quantity, recipes, category}
-        aggregated: Dict[tuple, dict] = defaultdict(lambda: {
-            "total_quantity": 0.0,
-            "recipes": [],
-            "category": None
-        })
+        # Aggregate ingredients across all recipes in a single pass
+        # Key: (ingredient_name, unit), Value: [total_quantity, recipe names, category]
+        aggregated: Dict[Tuple[str, str], list] = {}
 
         for recipe in recipes:
+            recipe_name = recipe.name
             for ingredient in recipe.ingredients:
-                key = (ingredient.ingredient_name.lower(), ingredient.unit)
+                name_key = ingredient.ingredient_name.lower()
+                if skip_owned and name_key in owned_set:
+                    continue
 
-                aggregated[key]["total_quantity"] += ingredient.quantity
-                aggregated[key]["recipes"].append(recipe.name)
-                # Category would come from the Ingredient model if we had it loaded
+                key = (name_key, ingredient.unit)
 
-        # Convert to GroceryListItem objects
-        grocery_list = []
-        for (ingredient_name, unit), data in aggregated.items():
-            is_owned = ingredient_name in owned_set
-
-            grocery_list.append(
-                GroceryListItem(
-                    ingredient_name=ingredient_name,
-                    total_quantity=round(data["total_quantity"], 2),
-                    unit=unit,
-                    category=data["category"],
-                    recipes_used_in=list(set(data["recipes"])),  # Remove duplicates
-                    already_owned=is_owned
-                )
-            )
+                row = aggregated.get(key)
+                if row is None:
+                    # Category would come from the Ingredient model if we had it loaded
+                    aggregated[key] = [ingredient.quantity, {recipe_name}, None]
+                else:
+                    row[0] += ingredient.quantity
+                    row[1].add(recipe_name)
 
-        # Sort grocery list by category (if available) and then by name
-        grocery_list.sort(key=lambda x: (x.category or "zzz", x.ingredient_name))
+        # Sort by category (if available) and then by name, before building the models
+        rows = sorted(aggregated.items(), key=_row_sort_key)
 
-        return grocery_list
+        # Convert to GroceryListItem objects
+        return [
+            GroceryListItem(
+                ingredient_name=ingredient_name,
+                total_quantity=round(total_quantity, 2),
+                unit=unit,
+                category=category,
+                recipes_used_in=list(recipe_names),
+                already_owned=ingredient_name in owned_set
+            )
+            for (ingredient_name, unit), (total_quantity, recipe_names, category) in rows
+        ]
 
     def optimize_grocery_list(
         self,
@@ -0,0 +1,40 @@
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+from urllib.parse import urlparse
+
+
+class HostThrottle:
+    """Limits concurrency and request rate per host for outbound recipe fetches"""
+
+    def __init__(self, max_concurrent_per_host: int = 2, min_interval_seconds: float = 1.0):
+        self.min_interval_seconds = min_interval_seconds
+        self._semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_concurrent_per_host)
+        )
+        # Key: host, Value: monotonic time of the most recently scheduled request
+        self._last_request: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """
+        Wait until a request to the URL's host is allowed, then hold a slot for it.
+
+        Requests to the same host are spaced at least min_interval_seconds apart
+        and at most max_concurrent_per_host run at once.
+
+        Args:
+            url: URL about to be requested
+        """
+        host = urlparse(url).netloc
+        async with self._semaphores[host]:
+            # Reserve the next start time before sleeping so concurrent callers
+            # for the same host queue up behind each other
+            now = time.monotonic()
+            start_at = max(now, self._last_request.get(host, 0.0) + self.min_interval_seconds)
+            self._last_request[host] = start_at
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+            yield
@@ -1,6 +1,10 @@
+import asyncio
 import json
+import logging
 import re
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import httpx
 import ollama
 import os
 from dotenv import load_dotenv
@@ -8,13 +12,163 @@ from ..schemas.query import ParsedQuery
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Maximum number of parsed queries kept per parser, evicted least-recently-used
+PARSE_CACHE_SIZE = 1024
+
+# Keep-alive pool for Ollama HTTP connections, reused across parses
+_OLLAMA_LIMITS = httpx.Limits(max_keepalive_connections=20)
+
+# The reply is one small JSON object, so cap context and output length and
+# decode greedily; keep_alive keeps the model loaded between requests
+_CHAT_OPTIONS = {"num_ctx": 1024, "num_predict": 256, "temperature": 0}
+
+# Fixed parsing instructions, sent as the system message so only the query
+# varies between requests. Ollama's format="json" constrains the reply to JSON
+_SYSTEM_PROMPT = """Extract meal planning info from the user's query as JSON with keys:
+dietary_restrictions: list (e.g. vegan, gluten-free, dairy-free, vegetarian)
+meal_types: list of breakfast, lunch, dinner, snack
+meal_count: integer or null
+owned_ingredients: list, ingredients the user already has
+required_ingredients: list, ingredients the recipes must use
+cuisine_preferences: list (e.g. Italian, Mexican)
+protein_requirement: minimum grams of protein per serving, integer or null
+other_requirements: string or null
+Use [] or null when not mentioned. Lowercase ingredient names."""
+
+# Patterns and keyword tables used by the parser, compiled once at import
+_WHITESPACE_RE = re.compile(r"\s+")
+_COUNT_RE = re.compile(r'(\d+)\s*(meal|dinner|lunch|breakfast)')
+_HAVE_RE = re.compile(r'(?:have|own|already have|got)\s+([^.!?]+)')
+_SPLIT_RE = re.compile(r',|\sand\s')
+
+# Keyword as written in a query -> (ParsedQuery field, normalized value)
+_KEYWORDS = {
+    "vegan": ("dietary_restrictions", "vegan"),
+    "vegetarian": ("dietary_restrictions", "vegetarian"),
+    "gluten-free": ("dietary_restrictions", "gluten-free"),
+    "gluten free": ("dietary_restrictions", "gluten-free"),
+    "dairy-free": ("dietary_restrictions", "dairy-free"),
+    "dairy free": ("dietary_restrictions", "dairy-free"),
+    "keto": ("dietary_restrictions", "keto"),
+    "paleo": ("dietary_restrictions", "paleo"),
+    "breakfast": ("meal_types", "breakfast"),
+    "lunch": ("meal_types", "lunch"),
+    "dinner": ("meal_types", "dinner"),
+    "snack": ("meal_types", "snack"),
+}
+# All keywords in one alternation (longest first) so a query is scanned once
+_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in sorted(_KEYWORDS, key=len, reverse=True)))
+
+
+class _JsonObjectScanner:
+    """
+    Finds the end of the first JSON object in text that may arrive in pieces.
+
+    Tracks brace depth, ignoring braces inside string literals, so a stream
+    can be closed as soon as the object is complete.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> int:
+        """
+        Scan the next piece of text.
+
+        Returns:
+            Index in `text` just past the object's closing brace, or -1 if the
+            object is not complete yet
+        """
+        for i, char in enumerate(text):
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+
+        return -1
+
+
+class _JsonReplyCollector:
+    """Accumulates streamed chat chunks up to the end of the first JSON object"""
+
+    def __init__(self):
+        self._scanner = _JsonObjectScanner()
+        self._parts: List[str] = []
+
+    def add(self, chunk: Dict[str, Any]) -> bool:
+        """
+        Add one streamed chat chunk.
+
+        Returns:
+            True once the JSON object is complete and the stream can be closed
+        """
+        text = chunk["message"]["content"]
+        end = self._scanner.feed(text)
+        if end >= 0:
+            self._parts.append(text[:end])
+            return True
+        self._parts.append(text)
+        return False
+
+    @property
+    def content(self) -> str:
+        """Reply text collected so far"""
+        return "".join(self._parts)
+
 
 class NLPParser:
     """Parses natural language queries using Ollama LLM"""
 
     def __init__(self):
         self.ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        self.model = os.getenv("OLLAMA_MODEL", "llama2")
+        self.model = os.getenv("OLLAMA_MODEL", "llama3.2:3b-instruct-q4_K_M")
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        # Long-lived client so every parse reuses pooled keep-alive connections
+        self._client = ollama.Client(host=self.ollama_host, limits=_OLLAMA_LIMITS)
+        # Created on first async use so it binds to the running event loop
+        self._async_client: Optional[ollama.AsyncClient] = None
+        # LLM parse results keyed by normalized query text
+        self._cache: "OrderedDict[str, ParsedQuery]" = OrderedDict()
+
+    async def aclose(self) -> None:
+        """Close pooled Ollama connections"""
+        # ollama's clients don't expose close(); each wraps an httpx client in _client
+        self._client._client.close()
+        if self._async_client is not None:
+            await self._async_client._client.aclose()
+            self._async_client = None
+
+    def preload(self) -> None:
+        """Load the model into Ollama ahead of the first query to avoid a cold start"""
+        try:
+            # Same options as the chat calls: Ollama reloads the model when num_ctx differs
+            self._client.generate(model=self.model, prompt="", options=_CHAT_OPTIONS, keep_alive=self.keep_alive)
+        except Exception as e:
+            logger.warning("Could not preload Ollama model %s: %s", self.model, e)
 
     def parse_query(self, query: str) -> ParsedQuery:
         """
@@ -26,105 +180,185 @@ class NLPParser:
         Returns:
             ParsedQuery object with extracted information
         """
-        prompt = self._create_prompt(query)
+        cache_key = self._normalize(query)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            # Call Ollama API
-            response = ollama.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-            )
+            # Call Ollama API, streaming so generation can stop right after the JSON
+            stream = self._client.chat(**self._chat_kwargs(query))
+            collector = _JsonReplyCollector()
+            try:
+                for chunk in stream:
+                    if collector.add(chunk):
+                        break
+            finally:
+                # Closing the stream drops the connection, which stops generation
+                stream.close()
+
+            parsed_query = self._to_parsed_query(collector.content)
 
-            # Extract the response content
-            content = response["message"]["content"]
+        except Exception as e:
+            return self._fallback_after_error(query, e)
+
+        self._store_cached(cache_key, parsed_query)
+        return parsed_query
+
+    async def aparse_query(self, query: str) -> ParsedQuery:
+        """
+        Parse a natural language query without blocking the event loop.
+
+        Args:
+            query: Natural language query from user
+
+        Returns:
+            ParsedQuery object with extracted information
+        """
+        if self._async_client is None:
+            self._async_client = ollama.AsyncClient(host=self.ollama_host, limits=_OLLAMA_LIMITS)
+        return await self._aparse_one(self._async_client, query)
+
+    def parse_queries(self, queries: List[str]) -> List[ParsedQuery]:
+        """
+        Parse several queries concurrently.
+
+        All prompts are sent at once, so wall time is roughly that of the
+        slowest query. Ollama only processes them in parallel when the server
+        runs with OLLAMA_NUM_PARALLEL > 1; otherwise it queues them internally.
 
-            # Parse the JSON response
-            parsed_data = self._extract_json(content)
+        Args:
+            queries: Natural language queries
+
+        Returns:
+            ParsedQuery objects in the same order as queries
+        """
+        async def parse_all() -> List[ParsedQuery]:
+            # A fresh client, since asyncio.run creates a new event loop
+            client = ollama.AsyncClient(host=self.ollama_host, limits=_OLLAMA_LIMITS)
+            try:
+                return await asyncio.gather(*(self._aparse_one(client, query) for query in queries))
+            finally:
+                await client._client.aclose()
 
-            return ParsedQuery(**parsed_data)
+        return asyncio.run(parse_all())
+
+    async def _aparse_one(self, client: ollama.AsyncClient, query: str) -> ParsedQuery:
+        """Parse one query with the given async client, falling back to basic parsing on failure"""
+        cache_key = self._normalize(query)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            stream = await client.chat(**self._chat_kwargs(query))
+            collector = _JsonReplyCollector()
+            try:
+                async for chunk in stream:
+                    if collector.add(chunk):
+                        break
+            finally:
+                await stream.aclose()
+
+            parsed_query = self._to_parsed_query(collector.content)
 
         except Exception as e:
-            # Fallback to basic parsing if LLM fails
-            print(f"LLM parsing failed: {e}. Falling back to basic parsing.")
-            return self._fallback_parse(query)
-
-    def _create_prompt(self, query: str) -> str:
-        """Create a structured prompt for the LLM"""
-        return f"""You are a meal planning assistant. Parse the following natural language query and extract structured information.
-
-User Query: "{query}"
-
-Extract the following information and respond ONLY with a valid JSON object (no additional text):
-{{
-  "dietary_restrictions": ["list of dietary restrictions like vegan, gluten-free, dairy-free, vegetarian, etc."],
-  "meal_types": ["list of meal types like breakfast, lunch, dinner, snack"],
-  "meal_count": number of meals requested (integer or null),
-  "owned_ingredients": ["list of ingredients the user already has"],
-  "required_ingredients": ["list of ingredients that MUST be in the recipe, like 'ground beef', 'chicken breast', 'salmon'"],
-  "cuisine_preferences": ["list of cuisine preferences like Italian, Mexican, Asian, etc."],
-  "protein_requirement": minimum protein in grams per serving (integer or null),
-  "other_requirements": "any other requirements or preferences as a string"
-}}
-
-Important:
-- Only include fields if they are mentioned in the query
-- Use empty arrays [] for lists if nothing is mentioned
-- Use null for meal_count and protein_requirement if not specified
-- Normalize ingredient names to lowercase
-- Normalize dietary restrictions to standard terms
-- "owned_ingredients" = ingredients the user ALREADY HAS
-- "required_ingredients" = ingredients that MUST BE IN the recipe
-- Look for protein requirements like "30g protein", "high protein", "at least 25g protein per serving"
-
-JSON Response:"""
+            return self._fallback_after_error(query, e)
+
+        self._store_cached(cache_key, parsed_query)
+        return parsed_query
+
+    def _chat_kwargs(self, query: str) -> Dict[str, Any]:
+        """Arguments for a streamed, JSON-formatted Ollama chat call, shared by the sync and async paths"""
+        return {
+            "model": self.model,
+            "messages": self._create_messages(query),
+            "format": "json",
+            "options": _CHAT_OPTIONS,
+            "keep_alive": self.keep_alive,
+            "stream": True,
+        }
+
+    def _to_parsed_query(self, content: str) -> ParsedQuery:
+        """Parse the collected LLM reply into a validated ParsedQuery"""
+        return ParsedQuery(**self._extract_json(content))
+
+    def _fallback_after_error(self, query: str, error: Exception) -> ParsedQuery:
+        """Fallback to basic parsing if LLM fails"""
+        logger.warning("LLM parsing failed: %s. Falling back to basic parsing.", error)
+        return self._fallback_parse(query)
+
+    def _normalize(self, query: str) -> str:
+        """Normalize a query so trivially different phrasings share a cache key"""
+        return _WHITESPACE_RE.sub(" ", query.strip().lower())
+
+    def _get_cached(self, cache_key: str) -> Optional[ParsedQuery]:
+        """Return a copy of a cached parse result, or None on a miss"""
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return None
+        self._cache.move_to_end(cache_key)
+        return cached.model_copy(deep=True)
+
+    def _store_cached(self, cache_key: str, parsed_query: ParsedQuery) -> None:
+        """
+        Cache a successful LLM parse result.
+
+        Fallback results are never cached, so a query parsed while Ollama was
+        unavailable gets a proper LLM parse on the next attempt.
+        """
+        self._cache[cache_key] = parsed_query.model_copy(deep=True)
+        if len(self._cache) > PARSE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _create_messages(self, query: str) -> List[Dict[str, str]]:
+        """Create the chat messages for the LLM: the fixed instructions plus the raw query"""
+        return [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": query},
+        ]
 
     def _extract_json(self, content: str) -> Dict[str, Any]:
         """Extract JSON from LLM response, handling various formats"""
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            return json.loads(json_str)
+        # Find the first balanced JSON object in a single forward scan
+        start = content.find("{")
+        if start >= 0:
+            end = _JsonObjectScanner().feed(content[start:])
+            if end >= 0:
+                return json.loads(content[start:start + end])
 
-        # If no JSON found, try parsing the whole response
+        # If no complete JSON object found, try parsing the whole response
         return json.loads(content)
 
     def _fallback_parse(self, query: str) -> ParsedQuery:
         """Simple rule-based fallback parser if LLM fails"""
         query_lower = query.lower()
 
-        # Extract dietary restrictions
-        dietary_keywords = {
-            "vegan": "vegan",
-            "vegetarian": "vegetarian",
-            "gluten-free": "gluten-free",
-            "gluten free": "gluten-free",
-            "dairy-free": "dairy-free",
-            "dairy free": "dairy-free",
-            "keto": "keto",
-            "paleo": "paleo",
-        }
-        dietary_restrictions = [v for k, v in dietary_keywords.items() if k in query_lower]
+        # Extract dietary restrictions and meal types in a single pass.
+        # Dicts act as ordered sets, so "gluten free" and "gluten-free" yield one entry
+        keyword_matches: Dict[str, Dict[str, None]] = {"dietary_restrictions": {}, "meal_types": {}}
+        for match in _KEYWORD_RE.finditer(query_lower):
+            field, value = _KEYWORDS[match.group(0)]
+            keyword_matches[field][value] = None
 
-        # Extract meal types
-        meal_keywords = ["breakfast", "lunch", "dinner", "snack"]
-        meal_types = [meal for meal in meal_keywords if meal in query_lower]
+        dietary_restrictions = list(keyword_matches["dietary_restrictions"])
+        meal_types = list(keyword_matches["meal_types"])
 
         # Extract meal count
         meal_count = None
-        count_match = re.search(r'(\d+)\s*(meal|dinner|lunch|breakfast)', query_lower)
+        count_match = _COUNT_RE.search(query_lower)
         if count_match:
             meal_count = int(count_match.group(1))
 
         # Extract owned ingredients (look for patterns like "I have X, Y, and Z")
         owned_ingredients = []
-        have_pattern = re.search(r'(?:have|own|already have|got)\s+([^.!?]+)', query_lower)
+        have_pattern = _HAVE_RE.search(query_lower)
         if have_pattern:
             ingredients_text = have_pattern.group(1)
             # Split by common delimiters
             owned_ingredients = [
                 ing.strip()
-                for ing in re.split(r',|\sand\s', ingredients_text)
+                for ing in _SPLIT_RE.split(ingredients_text)
                 if ing.strip()
             ]
 
@@ -0,0 +1,58 @@
+import hashlib
+import time
+from typing import Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models import RecipeCacheEntry
+from ..schemas.recipe import RecipeSchema
+
+
+class RecipeCache:
+    """Caches fetched web recipes by URL so repeat fetches skip the network and HTML parsing"""
+
+    def __init__(self, db: Session, max_age_seconds: int = 30 * 86400):
+        self.db = db
+        self.max_age_seconds = max_age_seconds
+
+    @staticmethod
+    def _url_hash(url: str) -> str:
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[RecipeSchema]:
+        """
+        Look up a previously fetched recipe.
+
+        Args:
+            url: Recipe URL
+
+        Returns:
+            Cached recipe, or None if missing or older than max_age_seconds
+        """
+        entry = self.db.get(RecipeCacheEntry, self._url_hash(url))
+        if entry is None or time.time() - entry.fetched_at >= self.max_age_seconds:
+            return None
+        return RecipeSchema.model_validate_json(entry.recipe_json)
+
+    def set(self, url: str, recipe: RecipeSchema) -> None:
+        """
+        Store (or replace) the cached copy of a fetched recipe.
+
+        Written as a single upsert so concurrent fetches of the same URL don't
+        race between a SELECT and an INSERT.
+        """
+        values = {
+            "url_hash": self._url_hash(url),
+            "recipe_json": recipe.model_dump_json(),
+            "fetched_at": int(time.time()),
+        }
+        insert = postgresql.insert if self.db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        statement = insert(RecipeCacheEntry).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[RecipeCacheEntry.url_hash],
+            set_={
+                "recipe_json": statement.excluded.recipe_json,
+                "fetched_at": statement.excluded.fetched_at,
+            }
+        )
+        self.db.execute(statement)
+        self.db.commit()
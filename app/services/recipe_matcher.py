@@ -1,16 +1,63 @@
-from typing import List
-from sqlalchemy.orm import Session
-from ..models import Recipe, DietaryRestriction
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import and_, distinct, func
+from sqlalchemy.orm import Session, Query, selectinload
+from ..models import Recipe, RecipeIngredient, Ingredient, DietaryRestriction
 from ..schemas.query import ParsedQuery
 from ..schemas.recipe import RecipeSchema, RecipeIngredientSchema
 
 
+# Rows fetched per batch when streaming recipes out of the database
+YIELD_PER = 50
+
+# Maximum number of recipes kept by get_recipe_by_id, evicted least-recently-used
+RECIPE_CACHE_SIZE = 512
+
+# How long a cached recipe is served, so writes from other processes
+# (seed script, other workers) show up without an explicit invalidation
+RECIPE_CACHE_TTL_SECONDS = 300
+
+# Converted recipes and their expiry time keyed by id, shared across requests
+# (each request gets its own RecipeMatcher). Sync routes run in a threadpool,
+# hence the lock
+_recipe_cache: "OrderedDict[int, Tuple[RecipeSchema, float]]" = OrderedDict()
+_recipe_cache_lock = threading.Lock()
+
+
+def invalidate_recipe_cache(recipe_id: Optional[int] = None) -> None:
+    """
+    Drop cached recipes after a write.
+
+    Args:
+        recipe_id: Recipe to drop, or None to clear the whole cache
+    """
+    with _recipe_cache_lock:
+        if recipe_id is None:
+            _recipe_cache.clear()
+        else:
+            _recipe_cache.pop(recipe_id, None)
+
+
 class RecipeMatcher:
     """Matches parsed queries to recipes in the database"""
 
     def __init__(self, db: Session):
         self.db = db
 
+    def _recipe_query(self) -> Query:
+        """
+        Base recipe query that eager-loads everything _recipe_to_schema touches.
+
+        Ingredients and dietary restrictions are fetched in one batched SELECT
+        each, instead of one lazy load per recipe (and per ingredient).
+        """
+        return self.db.query(Recipe).options(
+            selectinload(Recipe.recipe_ingredients).joinedload(RecipeIngredient.ingredient),
+            selectinload(Recipe.dietary_restrictions)
+        )
+
     def find_matching_recipes(self, parsed_query: ParsedQuery) -> List[RecipeSchema]:
         """
         Find recipes that match the parsed query requirements.
@@ -21,42 +68,88 @@ class RecipeMatcher:
         Returns:
             List of matching recipes
         """
+        return list(self.iter_matching_recipes(parsed_query))
+
+    def iter_matching_recipes(self, parsed_query: ParsedQuery) -> Iterator[RecipeSchema]:
+        """
+        Lazily yield recipes that match the parsed query requirements.
+
+        Rows are fetched in batches of YIELD_PER and converted one at a time,
+        so the full set of ORM objects is never held alongside the schemas.
+
+        Args:
+            parsed_query: Structured query data
+
+        Yields:
+            Matching recipes
+        """
+        for recipe in self._matching_query(parsed_query).yield_per(YIELD_PER):
+            yield self._recipe_to_schema(recipe)
+
+    def _matching_query(self, parsed_query: ParsedQuery) -> Query:
+        """Build the recipe query for the parsed query requirements"""
         # Start with all recipes
-        query = self.db.query(Recipe)
+        query = self._recipe_query()
 
         # Filter by meal type if specified
         if parsed_query.meal_types:
             query = query.filter(Recipe.meal_type.in_(parsed_query.meal_types))
 
+        # Per-recipe conditions checked after grouping the joined rows by recipe
+        group_conditions = []
+
         # Filter by dietary restrictions
         if parsed_query.dietary_restrictions:
-            # Get dietary restriction IDs
-            restrictions = self.db.query(DietaryRestriction).filter(
-                DietaryRestriction.name.in_(parsed_query.dietary_restrictions)
-            ).all()
+            # Only restrictions known to the database are enforced
+            restriction_ids = [
+                restriction_id
+                for (restriction_id,) in self.db.query(DietaryRestriction.id).filter(
+                    DietaryRestriction.name.in_(parsed_query.dietary_restrictions)
+                )
+            ]
 
-            if restrictions:
+            if restriction_ids:
                 # Recipe must have ALL specified dietary restrictions
-                for restriction in restrictions:
-                    query = query.filter(Recipe.dietary_restrictions.contains(restriction))
+                query = query.join(Recipe.dietary_restrictions).filter(
+                    DietaryRestriction.id.in_(restriction_ids)
+                )
+                group_conditions.append(
+                    func.count(distinct(DietaryRestriction.id)) == len(restriction_ids)
+                )
+
+        # Filter by required ingredients
+        if parsed_query.required_ingredients:
+            required = sorted({name.lower().strip() for name in parsed_query.required_ingredients})
+
+            # Recipe must use ALL required ingredients
+            query = query.join(Recipe.recipe_ingredients).join(RecipeIngredient.ingredient).filter(
+                func.lower(Ingredient.name).in_(required)
+            )
+            group_conditions.append(
+                func.count(distinct(func.lower(Ingredient.name))) == len(required)
+            )
 
         # Filter by cuisine if specified
         if parsed_query.cuisine_preferences:
             query = query.filter(Recipe.cuisine.in_(parsed_query.cuisine_preferences))
 
-        # Get all matching recipes
-        recipes = query.all()
+        if group_conditions:
+            query = query.group_by(Recipe.id).having(and_(*group_conditions))
 
-        # Limit results if meal_count is specified
+        # Limit results in the database if meal_count is specified
         if parsed_query.meal_count:
-            recipes = recipes[:parsed_query.meal_count]
+            query = query.limit(parsed_query.meal_count)
 
-        # Convert to schemas
-        return [self._recipe_to_schema(recipe) for recipe in recipes]
+        return query
 
     def _recipe_to_schema(self, recipe: Recipe) -> RecipeSchema:
-        """Convert SQLAlchemy Recipe model to Pydantic schema"""
-        return RecipeSchema(
+        """
+        Convert SQLAlchemy Recipe model to Pydantic schema.
+
+        Column types already match the schema fields, so validation is
+        skipped with model_construct.
+        """
+        return RecipeSchema.model_construct(
             id=recipe.id,
             name=recipe.name,
             description=recipe.description,
@@ -65,7 +158,7 @@ class RecipeMatcher:
             prep_time_minutes=recipe.prep_time_minutes,
             servings=recipe.servings,
             ingredients=[
-                RecipeIngredientSchema(
+                RecipeIngredientSchema.model_construct(
                     ingredient_name=ri.ingredient.name,
                     quantity=ri.quantity,
                     unit=ri.unit,
@@ -77,13 +170,37 @@ class RecipeMatcher:
         )
 
     def get_recipe_by_id(self, recipe_id: int) -> RecipeSchema:
-        """Get a specific recipe by ID"""
-        recipe = self.db.query(Recipe).filter(Recipe.id == recipe_id).first()
-        if recipe:
-            return self._recipe_to_schema(recipe)
-        return None
-
-    def get_all_recipes(self) -> List[RecipeSchema]:
-        """Get all recipes in the database"""
-        recipes = self.db.query(Recipe).all()
-        return [self._recipe_to_schema(recipe) for recipe in recipes]
+        """
+        Get a specific recipe by ID.
+
+        Found recipes are cached in memory for RECIPE_CACHE_TTL_SECONDS, so
+        repeated reads skip the database; callers get a copy they are free to
+        modify. Misses are not cached, so recipes saved later are picked up.
+        """
+        with _recipe_cache_lock:
+            entry = _recipe_cache.get(recipe_id)
+            if entry is not None:
+                cached, expires_at = entry
+                if time.monotonic() < expires_at:
+                    _recipe_cache.move_to_end(recipe_id)
+                    return cached.model_copy(deep=True)
+                del _recipe_cache[recipe_id]
+
+        recipe = self._recipe_query().filter(Recipe.id == recipe_id).first()
+        if not recipe:
+            return None
+
+        schema = self._recipe_to_schema(recipe)
+        with _recipe_cache_lock:
+            _recipe_cache[recipe_id] = (schema.model_copy(deep=True), time.monotonic() + RECIPE_CACHE_TTL_SECONDS)
+            _recipe_cache.move_to_end(recipe_id)
+            if len(_recipe_cache) > RECIPE_CACHE_SIZE:
+                _recipe_cache.popitem(last=False)
+        return schema
+
+    def get_all_recipes(self, limit: Optional[int] = None) -> List[RecipeSchema]:
+        """Get all recipes in the database, optionally capped at `limit` rows"""
+        query = self._recipe_query()
+        if limit:
+            query = query.limit(limit)
+        return [self._recipe_to_schema(recipe) for recipe in query.yield_per(YIELD_PER)]
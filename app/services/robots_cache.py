@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsCache:
+    """Caches parsed robots.txt rules per host so each host is fetched at most once per TTL"""
+
+    def __init__(self, user_agent: str = "*", ttl_seconds: float = 3600, failure_ttl_seconds: float = 60):
+        # Should match the User-Agent the recipe fetcher sends; rules are checked
+        # for it and robots.txt is downloaded with it
+        self.user_agent = user_agent
+        self.ttl_seconds = ttl_seconds
+        # Unreachable hosts are treated as disallowed for this long before retrying
+        self.failure_ttl_seconds = failure_ttl_seconds
+        # Key: "scheme://host", Value: (parsed rules, expiry timestamp)
+        self._cache: Dict[str, Tuple[RobotFileParser, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        # Pooled HTTP connections for robots.txt downloads
+        self._session = requests.Session()
+        if user_agent != "*":
+            self._session.headers["User-Agent"] = user_agent
+
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self._session.close()
+
+    async def can_fetch(self, url: str) -> bool:
+        """
+        Check whether robots.txt allows fetching a URL.
+
+        Only one coroutine per host downloads robots.txt; concurrent callers
+        for the same host wait on the lock and then reuse the cached rules.
+
+        Args:
+            url: URL to check
+
+        Returns:
+            True if the URL may be fetched
+        """
+        parsed_url = urlparse(url)
+        host = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+        parser = self._get_cached(host)
+        if parser is None:
+            async with self._locks[host]:
+                # Another coroutine may have loaded the rules while we waited
+                parser = self._get_cached(host)
+                if parser is None:
+                    parser, ttl = await asyncio.to_thread(self._load, host)
+                    self._cache[host] = (parser, time.monotonic() + ttl)
+
+        return parser.can_fetch(self.user_agent, url)
+
+    def _get_cached(self, host: str) -> Optional[RobotFileParser]:
+        """Return cached rules for a host if they have not expired"""
+        entry = self._cache.get(host)
+        if entry and time.monotonic() < entry[1]:
+            return entry[0]
+        return None
+
+    def _load(self, host: str) -> Tuple[RobotFileParser, float]:
+        """
+        Download and parse robots.txt for a host (blocking).
+
+        Returns:
+            Parsed rules and how long to cache them. Unreachable hosts get
+            disallow-all rules for failure_ttl_seconds, so their other URLs
+            don't each retry the download.
+        """
+        parser = RobotFileParser()
+        try:
+            response = self._session.get(f"{host}/robots.txt", timeout=10)
+        except requests.RequestException as e:
+            logger.warning("Could not fetch robots.txt for %s: %s", host, e)
+            parser.disallow_all = True
+            return parser, self.failure_ttl_seconds
+
+        # Server errors may be transient, so treat them like an unreachable host
+        if response.status_code >= 500:
+            logger.warning("robots.txt for %s returned %d", host, response.status_code)
+            parser.disallow_all = True
+            return parser, self.failure_ttl_seconds
+
+        # Same 4xx handling as RobotFileParser.read()
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+
+        return parser, self.ttl_seconds
@@ -30,7 +30,7 @@ fi
 if ! curl -s http://localhost:11434/api/tags > /dev/null 2>&1; then
     echo "WARNING: Ollama doesn't appear to be running!"
     echo "Please start Ollama with: ollama serve"
-    echo "And pull a model with: ollama pull llama2"
+    echo "And pull a model with: ollama pull llama3.2:3b-instruct-q4_K_M"
     echo ""
     read -p "Continue anyway? (y/n) " -n 1 -r
     echo
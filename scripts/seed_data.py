@@ -29,15 +29,18 @@ def seed_database():
             "dairy-free": DietaryRestriction(name="dairy-free", description="No dairy products"),
         }
 
-        for dr in dietary_restrictions.values():
-            existing = db.query(DietaryRestriction).filter_by(name=dr.name).first()
-            if not existing:
+        # Load the ones that already exist in one query and only add the rest
+        existing_restrictions = {
+            dr.name: dr
+            for dr in db.query(DietaryRestriction).filter(
+                DietaryRestriction.name.in_(list(dietary_restrictions))
+            )
+        }
+        for key, dr in dietary_restrictions.items():
+            if key in existing_restrictions:
+                dietary_restrictions[key] = existing_restrictions[key]
+            else:
                 db.add(dr)
-        db.commit()
-
-        # Refresh to get IDs
-        for key in dietary_restrictions:
-            dietary_restrictions[key] = db.query(DietaryRestriction).filter_by(name=key).first()
 
         # Create ingredients
         ingredients_data = [
@@ -58,16 +61,20 @@ def seed_database():
             {"name": "black pepper", "category": "pantry", "unit": "tsp"},
         ]
 
+        existing_ingredients = {
+            ing.name: ing
+            for ing in db.query(Ingredient).filter(
+                Ingredient.name.in_([ing_data["name"] for ing_data in ingredients_data])
+            )
+        }
+
         ingredients = {}
         for ing_data in ingredients_data:
-            existing = db.query(Ingredient).filter_by(name=ing_data["name"]).first()
-            if not existing:
+            ing = existing_ingredients.get(ing_data["name"])
+            if ing is None:
                 ing = Ingredient(**ing_data)
                 db.add(ing)
-                db.commit()
-                ingredients[ing_data["name"]] = ing
-            else:
-                ingredients[ing_data["name"]] = existing
+            ingredients[ing_data["name"]] = ing
 
         # Create sample recipes
         recipes_data = [
@@ -130,10 +137,16 @@ def seed_database():
             }
         ]
 
+        # Look up which sample recipes already exist in one query
+        existing_recipe_names = {
+            name for (name,) in db.query(Recipe.name).filter(
+                Recipe.name.in_([recipe_data["name"] for recipe_data in recipes_data])
+            )
+        }
+
+        new_recipes = []
         for recipe_data in recipes_data:
-            # Check if recipe already exists
-            existing = db.query(Recipe).filter_by(name=recipe_data["name"]).first()
-            if existing:
+            if recipe_data["name"] in existing_recipe_names:
                 print(f"Recipe '{recipe_data['name']}' already exists, skipping...")
                 continue
 
@@ -151,23 +164,23 @@ def seed_database():
             for dr_name in recipe_data["dietary_restrictions"]:
                 recipe.dietary_restrictions.append(dietary_restrictions[dr_name])
 
-            db.add(recipe)
-            db.commit()
-
-            # Add recipe ingredients
+            # Add recipe ingredients through the relationship so no recipe ID is needed yet
             for ing_data in recipe_data["ingredients"]:
-                ingredient = ingredients[ing_data["name"]]
-                recipe_ing = RecipeIngredient(
-                    recipe_id=recipe.id,
-                    ingredient_id=ingredient.id,
+                recipe.recipe_ingredients.append(RecipeIngredient(
+                    ingredient=ingredients[ing_data["name"]],
                     quantity=ing_data["quantity"],
                     unit=ing_data["unit"],
                     notes=ing_data.get("notes")
-                )
-                db.add(recipe_ing)
+                ))
+
+            new_recipes.append(recipe)
+
+        # Insert everything in one transaction
+        db.add_all(new_recipes)
+        db.commit()
 
-            db.commit()
-            print(f"Created recipe: {recipe_data['name']}")
+        for recipe in new_recipes:
+            print(f"Created recipe: {recipe.name}")
 
         print("\nDatabase seeded successfully!")
 
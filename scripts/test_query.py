@@ -27,20 +27,19 @@ def test_queries():
 
     print("Testing NLP Query Parser\n" + "="*50 + "\n")
 
-    for query in test_cases:
+    # Parse all test cases concurrently
+    results = parser.parse_queries(test_cases)
+
+    for query, result in zip(test_cases, results):
         print(f"Query: {query}")
         print("-" * 50)
 
-        try:
-            result = parser.parse_query(query)
-            print(f"Dietary Restrictions: {result.dietary_restrictions}")
-            print(f"Meal Types: {result.meal_types}")
-            print(f"Meal Count: {result.meal_count}")
-            print(f"Owned Ingredients: {result.owned_ingredients}")
-            print(f"Cuisine Preferences: {result.cuisine_preferences}")
-            print(f"Other Requirements: {result.other_requirements}")
-        except Exception as e:
-            print(f"Error: {e}")
+        print(f"Dietary Restrictions: {result.dietary_restrictions}")
+        print(f"Meal Types: {result.meal_types}")
+        print(f"Meal Count: {result.meal_count}")
+        print(f"Owned Ingredients: {result.owned_ingredients}")
+        print(f"Cuisine Preferences: {result.cuisine_preferences}")
+        print(f"Other Requirements: {result.other_requirements}")
 
         print("\n")
 